@@ -1,24 +1,46 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import polars as pl
+import altair as alt
 
 from game_functions import (
     normalise_and_compute_influence,
     compute_static_game_variables_v2,
-    initialize_G_and_W_and_T,
-    compute_C_t,
-    update_pressure,
-    compute_perceived_climate_benefit,
-    compute_real_climate_benefit,
-    best_response,
-    run_simulation
+    run_simulation,
+    adoption_summary,
+    country_payoffs
 )
 
+DATA_PATH = "cleaned_data.csv"
+
 # --- data load ---
 @st.cache_data
 def load_raw_data(path):
-    return pd.read_csv(path)
+    return pl.read_csv(path)
+
+# --- cached static variables: depend only on the country selection ---
+@st.cache_data
+def build_static(selected):
+    raw_df = load_raw_data(DATA_PATH)
+    # filter in polars, hand the small subset to the pandas game helpers
+    # (to_pandas builds a fresh frame the helpers can modify in place)
+    df = raw_df.filter(pl.col("Country Name").is_in(list(selected))).to_pandas()
+    df = normalise_and_compute_influence(df)
+    return compute_static_game_variables_v2(df)
+
+# --- cached simulation: reruns only when a parameter changes ---
+@st.cache_data
+def simulate(selected, N, lambda_u, gamma, Z, theta, min_gdp_threshold):
+    df = build_static(selected)
+
+    return run_simulation(
+        df,
+        N=N,
+        lambda_u=lambda_u,
+        gamma=gamma,
+        Z=Z,
+        theta=theta,
+        min_gdp_threshold=min_gdp_threshold
+    )
 
 # --- page title ---
 st.title("Climate Game Simulator")
@@ -37,8 +59,8 @@ st.markdown(
 )
 
 
-raw_df = load_raw_data("cleaned_data.csv")
-all_countries = sorted(raw_df["Country Name"].unique())
+raw_df = load_raw_data(DATA_PATH)
+all_countries = sorted(raw_df["Country Name"].unique().to_list())
 
 # --- sidebar: dynamic toggle w/ buttons ---
 st.sidebar.header("Included Countries")
@@ -61,11 +83,6 @@ selected_countries = st.sidebar.multiselect(
 # keep in sync
 st.session_state.selected_countries = selected_countries
 
-# --- filter + preprocess ---
-df = raw_df[raw_df["Country Name"].isin(selected_countries)].copy()
-df = normalise_and_compute_influence(df)
-df = compute_static_game_variables_v2(df)
-
 # --- sidebar: simulation parameters ---
 st.sidebar.header("Simulation Parameters")
 
@@ -87,9 +104,13 @@ st.sidebar.caption("Influence needed to trigger climate success.")
 min_gdp_threshold = st.sidebar.slider("Minimum GDP per capita to adopt", 0, 20000, 5000)
 st.sidebar.caption("Below this GDP, countries can't adopt.")
 
+if not selected_countries:
+    st.warning("Select at least one country to run the simulation.")
+    st.stop()
+
 # --- run simulation ---
-history = run_simulation(
-    df.copy(),
+result = simulate(
+    tuple(sorted(selected_countries)),
     N=N,
     lambda_u=lambda_u,
     gamma=gamma,
@@ -98,34 +119,30 @@ history = run_simulation(
     min_gdp_threshold=min_gdp_threshold
 )
 
-results = pd.concat(history, ignore_index=True)
-global_adoption = results.groupby("round")["W_t"].mean()
+summary = adoption_summary(result)
+global_adoption = summary["W_t"]
 
 # --- plot 1: global adoption trajectory ---
 st.subheader("Global Adoption Trajectory")
 
-fig, ax = plt.subplots(figsize=(8, 5))
-sns.set_style("whitegrid")
-sns.lineplot(data=global_adoption, marker="o", ax=ax)
-
-ax.set_xlabel("Round")
-ax.set_ylabel("Global Adoption Effort (Wₜ)")
-ax.set_title("Global Influence-Weighted Adoption Over Time")
-st.pyplot(fig)
+adoption_chart = alt.Chart(global_adoption.reset_index()).mark_line(point=True).encode(
+    x=alt.X("round:Q", title="Round", axis=alt.Axis(tickMinStep=1)),
+    y=alt.Y("W_t:Q", title="Global Adoption Effort (Wₜ)")
+).properties(title="Global Influence-Weighted Adoption Over Time")
+st.altair_chart(adoption_chart, use_container_width=True)
 
 # --- additional plot: % of countries adopting (unweighted) ---
 st.subheader("Share of Countries Adopting")
 
-adopt_counts = results.groupby("round")["G"].mean()
-
-fig2, ax2 = plt.subplots(figsize=(8, 5))
-sns.lineplot(x=adopt_counts.index, y=adopt_counts.values * 100, marker="s", ax=ax2)
+adopt_counts = summary["G_share"]
 
-ax2.set_xlabel("Round")
-ax2.set_ylabel("% of Countries Adopting")
-ax2.set_title("Adoption Share (Unweighted)")
-ax2.grid(True)
-st.pyplot(fig2)
+share_chart = alt.Chart((adopt_counts * 100).reset_index()).mark_line(
+    point=alt.OverlayMarkDef(shape="square")
+).encode(
+    x=alt.X("round:Q", title="Round", axis=alt.Axis(tickMinStep=1)),
+    y=alt.Y("G_share:Q", title="% of Countries Adopting")
+).properties(title="Adoption Share (Unweighted)")
+st.altair_chart(share_chart, use_container_width=True)
 
 
 
@@ -142,18 +159,25 @@ st.pyplot(fig2)
 # --- plot 2: country-level payoff comparison ---
 st.sidebar.header("Visualise Country Payoffs")
 
-country_focus = st.sidebar.selectbox("Track a country", sorted(df["Country Name"].unique()))
-country_data = results[results["Country Name"] == country_focus]
+country_focus = st.sidebar.selectbox("Track a country", sorted(selected_countries))
+country_data = country_payoffs(result, country_focus).reset_index()
 
 st.subheader(f"Payoff Comparison – {country_focus} (select any country)")
 
-fig_payoff, ax = plt.subplots(figsize=(8, 5))
-sns.lineplot(x="round", y="Payoff_if_adopt", data=country_data, label="Payoff: Adopt", marker="o", ax=ax)
-sns.lineplot(x="round", y="Payoff_if_free_ride", data=country_data, label="Payoff: Free-Ride", marker="o", ax=ax)
+payoff_lines = alt.Chart().transform_fold(
+    ["Payoff_if_adopt", "Payoff_if_free_ride"], as_=["payoff", "value"]
+).transform_calculate(
+    series="datum.payoff == 'Payoff_if_adopt' ? 'Payoff: Adopt' : 'Payoff: Free-Ride'"
+).mark_line(point=True).encode(
+    x=alt.X("round:Q", title="Round", axis=alt.Axis(tickMinStep=1)),
+    y=alt.Y("value:Q", title="Payoff (scaled)"),
+    color=alt.Color("series:N", title=None)
+)
+zero_line = alt.Chart().mark_rule(color="gray", strokeDash=[4, 4]).encode(y=alt.datum(0))
 
-ax.set_title(f"Adoption vs. Free-Ride Payoffs – {country_focus}")
-ax.set_xlabel("Round")
-ax.set_ylabel("Payoff (scaled)")
-ax.axhline(0, color="gray", linestyle="--", linewidth=0.8)
-ax.legend()
-st.pyplot(fig_payoff)
+st.altair_chart(
+    alt.layer(payoff_lines, zero_line, data=country_data).properties(
+        title=f"Adoption vs. Free-Ride Payoffs – {country_focus}"
+    ),
+    use_container_width=True
+)
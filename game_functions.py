@@ -1,7 +1,19 @@
 
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
 
+from game_kernel import (
+    set_num_threads,
+    pick_kernel,
+    c_t_uf,
+    pressure_uf,
+    perceived_benefit_uf,
+    best_response_uf
+)
+
 def normalise_and_compute_influence(df, alpha=0.5, beta=0.25, gamma=0.25):
     """
     Normalizes GDP, energy usage, and investment; computes country influence score.
@@ -11,24 +23,24 @@ def normalise_and_compute_influence(df, alpha=0.5, beta=0.25, gamma=0.25):
     - alpha, beta, gamma: weights for GDP, energy usage, and investment respectively
 
     Returns:
-    - df: modified DataFrame with normalized columns and influence score
+    - df: the same DataFrame, with normalized columns and influence score added in place
+      (pass a copy if the original must stay untouched)
     """
-    df = df.copy()
-
-    # normalize core metrics
-    df["GDP_norm"] = df["GDP (constant 2015 US$)"] / df["GDP (constant 2015 US$)"].sum()
-    df["investment_norm"] = df["Gross capital formation (constant 2015 US$)"] / df["Gross capital formation (constant 2015 US$)"].sum()
-    df["energy_norm"] = df["energy_usage"] / df["energy_usage"].sum()
-
-    # compute influence
-    df["influence"] = (
-        alpha * df["GDP_norm"] +
-        beta * df["energy_norm"] +
-        gamma * df["investment_norm"]
-    )
-
-    # normalize influence
-    df["influence"] /= df["influence"].sum()
+    # normalize core metrics: (n, 3) block, each column divided by its total
+    X = df[[
+        "GDP (constant 2015 US$)",
+        "energy_usage",
+        "Gross capital formation (constant 2015 US$)"
+    ]].to_numpy(dtype=np.float64)
+    X = X / X.sum(axis=0)
+
+    df["GDP_norm"] = X[:, 0]
+    df["energy_norm"] = X[:, 1]
+    df["investment_norm"] = X[:, 2]
+
+    # compute and normalize influence
+    influence = X @ np.array([alpha, beta, gamma])
+    df["influence"] = influence / influence.sum()
 
     return df
 
@@ -49,10 +61,8 @@ def compute_static_game_variables_v2(df, base_alpha=1.0, scaling_factor=100000,
     - Pressure_t
 
     Returns:
-    - df: modified DataFrame with new static columns
+    - df: the same DataFrame, with new static columns added in place
     """
-    df = df.copy()
-
     # carbon intensity (dirtiness) scaled
     max_ci = df["Carbon intensity of GDP (kg CO2e per constant 2015 US$ of GDP)"].max()
     df["alpha_i"] = base_alpha * (
@@ -111,13 +121,24 @@ def initialize_G_and_W_and_T(df, min_gdp_threshold, theta=0.6):
 
 
 
+def _like_input(src, values, keep_name=True):
+    """
+    Returns ufunc output in the caller's container: a Series on src's index
+    (and, with keep_name, its name) if src is one, otherwise the plain array.
+    """
+    if isinstance(src, pd.Series):
+        return pd.Series(values, index=src.index, name=src.name if keep_name else None)
+    return values
+
+
+
 ###COSTS
 def compute_C_t(C_t, W_t, Z=0.4):
     """
     Return cost of adoption for all players, independent of their G status.
     Actual cost is only applied if a player adopts.
     """
-    return C_t * (1 - Z * (1 + W_t))
+    return _like_input(C_t, c_t_uf(np.asarray(C_t, dtype=np.float64), W_t, Z))
 
 
 
@@ -128,9 +149,10 @@ def update_pressure(df, W_t, gamma=1.05):
     """
     Update country-specific pressure based on prior value and global adoption.
 
-    Returns a pd.Series
+    Returns a pd.Series if df["Pressure_t"] is one, otherwise an ndarray
     """
-    return df["Pressure_t"] * (gamma * (1 + W_t))
+    P_t = df["Pressure_t"]
+    return _like_input(P_t, pressure_uf(np.asarray(P_t, dtype=np.float64), W_t, gamma))
 
 
 
@@ -146,9 +168,10 @@ def compute_perceived_climate_benefit(df, T_d, U_t):
     - U_t: urgency scalar at time t (e.g. (t / N)^λ)
 
     Returns:
-    - Series of perceived climate benefits for each country
+    - perceived climate benefit for each country (a Series if df["ClimatePayoff"] is one, otherwise an ndarray)
     """
-    return (1 - T_d) * U_t * df["ClimatePayoff"] * 0.25
+    payoff = df["ClimatePayoff"]
+    return _like_input(payoff, perceived_benefit_uf(np.asarray(payoff, dtype=np.float64), T_d, U_t))
 
 
 
@@ -170,9 +193,50 @@ def compute_real_climate_benefit(df, T_d):
 
 
 def best_response(df, min_gdp_threshold=5000):
-    return ((df["Payoff_if_adopt"] > df["Payoff_if_free_ride"]) & 
-            (df["GDP per capita"] > min_gdp_threshold)).astype(int)
+    adopt = df["Payoff_if_adopt"]
+    G = best_response_uf(
+        np.asarray(adopt, dtype=np.float64),
+        np.asarray(df["Payoff_if_free_ride"], dtype=np.float64),
+        np.asarray(df["GDP per capita"], dtype=np.float64),
+        min_gdp_threshold
+    )
+    # unnamed Series, as before the ufunc
+    return _like_input(adopt, G, keep_name=False)
+
+
 
+# static per-country inputs to the kernel, one plain array per field (in kernel argument order)
+GameState = namedtuple(
+    "GameState",
+    ["C0", "EconomicGains", "ClimatePayoff", "Pressure0", "influence", "gdp_pc"]
+)
+
+
+def extract_game_state(df, dtype=np.float32):
+    """
+    Pulls the static game columns out of df once as contiguous arrays.
+
+    float32 by default: indicator ratios don't need float64, and half the
+    width halves memory traffic in the kernel.
+
+    Returns:
+    - GameState of 1-D arrays, one entry per country
+    """
+    return GameState(
+        C0=df["C_0_i"].to_numpy(dtype=dtype),
+        EconomicGains=df["EconomicGains"].to_numpy(dtype=dtype),
+        ClimatePayoff=df["ClimatePayoff"].to_numpy(dtype=dtype),
+        Pressure0=df["Pressure_0"].to_numpy(dtype=dtype),
+        influence=df["influence"].to_numpy(dtype=dtype),
+        gdp_pc=df["GDP per capita"].to_numpy(dtype=dtype),
+    )
+
+
+# compact simulation output: strategies, global adoption and the two payoffs per round
+SimulationResult = namedtuple(
+    "SimulationResult",
+    ["country_names", "country_index", "G_hist", "W_hist", "payoffs_hist"]
+)
 
 
 def run_simulation(df, N=10, lambda_u=1, gamma=1.05, Z=0.1, theta=0.8, min_gdp_threshold=5000):
@@ -180,7 +244,8 @@ def run_simulation(df, N=10, lambda_u=1, gamma=1.05, Z=0.1, theta=0.8, min_gdp_t
     Simulates N rounds of the Climate Catastrophe Game.
 
     Parameters:
-    - df: initialized DataFrame with all static variables
+    - df: DataFrame already run through normalise_and_compute_influence and
+      compute_static_game_variables_v2 (not recomputed here)
     - N: number of rounds
     - lambda_u: urgency growth exponent
     - gamma: pressure growth rate
@@ -189,52 +254,97 @@ def run_simulation(df, N=10, lambda_u=1, gamma=1.05, Z=0.1, theta=0.8, min_gdp_t
     - min_gdp_threshold: GDP per capita cutoff for eligibility to adopt
 
     Returns:
-    - history: list of DataFrames, one per round with key metrics
-    """
-    df = compute_static_game_variables_v2(df)
-    df = normalise_and_compute_influence(df)
-    df, W_t, T = initialize_G_and_W_and_T(df, min_gdp_threshold, theta)
-
-    history = []
-
-    for t in range(1, N + 1):
-        # compute urgency and threshold dummy
-        U_t = ((t / N) ** lambda_u) * 0.1
-        T_d = 1 if W_t >= T else 0
-
-        # update moving variables
-        df["C_t"] = compute_C_t(df["C_0_i"], W_t, Z)
-        df["Pressure_t"] = update_pressure(df, W_t, gamma)
-        df["Perceived_Climate_B"] = compute_perceived_climate_benefit(df, T_d, U_t)
-        df["Real_Climate_B"] = compute_real_climate_benefit(df, T_d)
-
-        # compute payoffs
-        df["Payoff_if_adopt"] = (
-            df["EconomicGains"] + df["Perceived_Climate_B"] + df["Real_Climate_B"] - df["C_t"]
-        )
-        df["Payoff_if_free_ride"] = (
-            - df["Pressure_t"] + df["Real_Climate_B"] 
-        )
-
-        # update strategies
-        df["G"] = best_response(df, min_gdp_threshold)
-
-        # update W_t based on new adoptions
-        W_t = (df["G"] * df["influence"]).sum()
-
-        # snapshot state for this round
-        snapshot = df.copy()
-        snapshot["round"] = t
-        snapshot["W_t"] = W_t
-        snapshot["U_t"] = U_t
-        snapshot["T_d"] = T_d
-
-        history.append(snapshot[[
-            "round", "Country Name", "G", "W_t", "U_t", "T_d",
-            "C_t", "EconomicGains", "Pressure_t",
-            "Perceived_Climate_B", "Real_Climate_B",
-            "Payoff_if_adopt", "Payoff_if_free_ride"
-        ]])
-
-    return history
+    - SimulationResult with
+      - country_names: array of country names, in df row order
+      - country_index: dict mapping country name -> column in the history arrays
+      - G_hist: (N, n) int8 strategies after each round
+      - W_hist: (N,) global adoption W_t after each round
+      - payoffs_hist: (N, n, 2) Payoff_if_adopt [..., 0] and Payoff_if_free_ride [..., 1]
+    """
+    names = df["Country Name"].to_numpy()
+    state = extract_game_state(df)
+    G_hist, W_hist, payoffs_hist = pick_kernel(len(names))(
+        *state,
+        N, np.float32(lambda_u), np.float32(gamma), np.float32(Z),
+        np.float32(theta), np.float32(min_gdp_threshold)
+    )
+
+    return SimulationResult(
+        country_names=names,
+        country_index={name: i for i, name in enumerate(names)},
+        G_hist=G_hist,
+        W_hist=W_hist,
+        payoffs_hist=payoffs_hist
+    )
+
+
+def adoption_summary(result):
+    """
+    Per-round global adoption (W_t) and share of countries adopting (G_share).
+
+    Returns:
+    - DataFrame indexed by round
+    """
+    N = len(result.W_hist)
+    return pd.DataFrame(
+        {"W_t": result.W_hist, "G_share": result.G_hist.mean(axis=1)},
+        index=pd.RangeIndex(1, N + 1, name="round")
+    )
+
+
+def country_payoffs(result, name):
+    """
+    Adopt vs. free-ride payoffs of one country across rounds.
+
+    Returns:
+    - DataFrame indexed by round with Payoff_if_adopt and Payoff_if_free_ride
+    """
+    payoffs = result.payoffs_hist[:, result.country_index[name], :]
+    return pd.DataFrame(
+        payoffs,
+        columns=["Payoff_if_adopt", "Payoff_if_free_ride"],
+        index=pd.RangeIndex(1, len(payoffs) + 1, name="round")
+    )
+
+
+###PARAMETER SWEEPS
+def simulate_one(df, params):
+    """
+    Runs one simulation for a dict of run_simulation keyword arguments.
+    Module-level so it can be sent to worker processes.
+    """
+    return run_simulation(df, **params)
+
+
+# prepared frame for the current sweep, set once per worker process by _init_sweep_worker
+_SWEEP_DF = None
+
+
+def _init_sweep_worker(df):
+    global _SWEEP_DF
+    _SWEEP_DF = df
+    # the pool already uses one process per core; don't let each one start a full numba thread pool too
+    set_num_threads(1)
+
+
+def _sweep_one(params):
+    return simulate_one(_SWEEP_DF, params)
 
+
+def run_parameter_sweep(df, param_grid, max_workers=None):
+    """
+    Runs run_simulation once per parameter set, fanned out across processes.
+
+    Parameters:
+    - df: prepared DataFrame (see run_simulation), sent to each worker once
+    - param_grid: iterable of dicts of run_simulation keyword arguments,
+      e.g. [{"lambda_u": l, "gamma": g} for l in (0.5, 1, 2) for g in (0.8, 1.2)]
+    - max_workers: number of worker processes (default: one per core)
+
+    Returns:
+    - list of SimulationResult, in param_grid order
+    """
+    with ProcessPoolExecutor(
+        max_workers=max_workers, initializer=_init_sweep_worker, initargs=(df,)
+    ) as ex:
+        return list(ex.map(_sweep_one, param_grid))
@@ -0,0 +1,246 @@
+
+import functools
+
+import numpy as np
+
+try:
+    from numba import get_num_threads, njit, prange, set_num_threads, vectorize
+    HAVE_NUMBA = True
+except ImportError:
+    # no numba: the round loop falls back to _run_rounds_numpy below, which
+    # gives bit-identical results; the helper ufuncs run through np.vectorize
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+    def vectorize(signatures, **kwargs):
+        # output dtype from the first signature, e.g. "int64(float64, ...)";
+        # also lets np.vectorize take empty input
+        otype = np.dtype(signatures[0].split("(", 1)[0])
+        return lambda func: np.vectorize(func, otypes=[otype])
+
+    prange = range
+
+    def get_num_threads():
+        return 1
+
+    def set_num_threads(n):
+        pass
+
+
+def _lazy_vectorize(signatures, **kwargs):
+    """
+    vectorize(signatures, **kwargs), but built on the first call instead of at
+    import, so importing the module doesn't compile ufuncs nothing may call.
+    """
+    def wrap(func):
+        ufunc = None
+
+        @functools.wraps(func)
+        def call(*args):
+            nonlocal ufunc
+            if ufunc is None:
+                ufunc = vectorize(signatures, **kwargs)(func)
+            return ufunc(*args)
+        return call
+    return wrap
+
+
+###Elementwise ufuncs (one scalar per country, W_t/T_d/U_t broadcast)
+# target="cpu": country counts (~200) are too small to pay for thread start-up
+
+@_lazy_vectorize(["float64(float64, float64, float64)"], target="cpu", cache=True)
+def c_t_uf(C0, W_t, Z):
+    return C0 * (1 - Z * (1 + W_t))
+
+
+@_lazy_vectorize(["float64(float64, float64, float64)"], target="cpu", cache=True)
+def pressure_uf(Pressure_t, W_t, gamma):
+    return Pressure_t * (gamma * (1 + W_t))
+
+
+@_lazy_vectorize(["float64(float64, float64, float64)"], target="cpu", cache=True)
+def perceived_benefit_uf(ClimatePayoff, T_d, U_t):
+    return (1 - T_d) * U_t * ClimatePayoff * 0.25
+
+
+@_lazy_vectorize(["int64(float64, float64, float64, float64)"], target="cpu", cache=True)
+def best_response_uf(payoff_adopt, payoff_free_ride, gdp_pc, min_gdp_threshold):
+    if payoff_adopt > payoff_free_ride and gdp_pc > min_gdp_threshold:
+        return 1
+    return 0
+
+
+@njit(cache=True)
+def best_response_nb(adopt_score, gdp_pc, min_gdp_threshold):
+    """
+    Scalar best response for one country: adopt (1) or free-ride (0).
+
+    adopt_score is Payoff_if_adopt - Payoff_if_free_ride with the real
+    climate benefit cancelled out: EconomicGains - C_t + Perceived + Pressure_t.
+    """
+    if adopt_score > 0 and gdp_pc > min_gdp_threshold:
+        return 1
+    return 0
+
+
+def _run_rounds(C0, EconomicGains, ClimatePayoff, Pressure0, influence, gdp_pc,
+                N, lambda_u, gamma, Z, theta, min_gdp_threshold):
+    """
+    N-round loop of the Climate Catastrophe Game, compiled below as
+    run_simulation_nb (serial) and run_simulation_parallel_nb when numba is
+    installed.
+
+    Parameters:
+    - C0, EconomicGains, ClimatePayoff, Pressure0, influence, gdp_pc: 1-D float arrays of one dtype, one entry per country
+    - N, lambda_u, gamma, Z, theta, min_gdp_threshold: see game_functions.run_simulation
+
+    Returns:
+    - G_hist: (N, n) int8 strategies after each round
+    - W_hist: (N,) global adoption W_t after each round
+    - payoffs_hist: (N, n, 2) Payoff_if_adopt [..., 0] and Payoff_if_free_ride [..., 1]
+    """
+    n = C0.shape[0]
+
+    # only what the app reads back; payoffs keep the input precision
+    G_hist = np.empty((N, n), np.int8)
+    W_hist = np.empty(N)
+    payoffs_hist = np.empty((N, n, 2), C0.dtype)
+
+    # initial strategies, adoption and threshold
+    # float64 accumulators: float32 inputs must not pull the sums down to float32
+    G = np.empty(n, np.int8)
+    W_t = np.float64(0.0)
+    T = np.float64(0.0)
+    for i in range(n):
+        G[i] = EconomicGains[i] > C0[i] and gdp_pc[i] > min_gdp_threshold
+        W_t += G[i] * influence[i]
+        T += influence[i]
+    T *= theta
+
+    P = Pressure0.copy()
+
+    # urgency for every round up front: U_t = 0.1 * (t / N)^lambda
+    U = 0.1 * (np.arange(1, N + 1) / N) ** lambda_u
+
+    for t in range(1, N + 1):
+        r = t - 1
+
+        # urgency and threshold dummy
+        U_t = U[r]
+        T_d = 1.0 if W_t >= T else 0.0
+
+        # per-round scalars; perceived + real benefit = ClimatePayoff * benefit_scale
+        cost_scale = 1 - Z * (1 + W_t)
+        pressure_scale = gamma * (1 + W_t)
+        perceived_scale = (1.0 - T_d) * U_t * 0.25
+        benefit_scale = T_d + perceived_scale
+
+        # countries update independently (prange is a plain range in the serial build)
+        for i in prange(n):
+            C_t = C0[i] * cost_scale
+            P[i] = P[i] * pressure_scale
+
+            # real benefit is paid either way, so it drops out of the decision
+            adopt_score = EconomicGains[i] - C_t + ClimatePayoff[i] * perceived_scale + P[i]
+            G[i] = best_response_nb(adopt_score, gdp_pc[i], min_gdp_threshold)
+
+            G_hist[r, i] = G[i]
+            payoffs_hist[r, i, 0] = EconomicGains[i] - C_t + ClimatePayoff[i] * benefit_scale
+            payoffs_hist[r, i, 1] = ClimatePayoff[i] * T_d - P[i]
+
+        # serial sum keeps W_t bit-identical between the two builds and across thread counts
+        W_t = np.float64(0.0)
+        for i in range(n):
+            W_t += G[i] * influence[i]
+        W_hist[r] = W_t
+
+    return G_hist, W_hist, payoffs_hist
+
+
+def _ordered_sum(x):
+    # strict left-to-right float64 sum, matching the compiled loops
+    # (np.sum is pairwise and would round differently)
+    return np.cumsum(x, dtype=np.float64)[-1] if len(x) else np.float64(0.0)
+
+
+def _run_rounds_numpy(C0, EconomicGains, ClimatePayoff, Pressure0, influence, gdp_pc,
+                      N, lambda_u, gamma, Z, theta, min_gdp_threshold):
+    """
+    Vectorised NumPy version of _run_rounds, used when numba isn't installed.
+
+    Same arguments and returns. Every per-round scalar is a float64 and the
+    W_t sums run left to right, as in the compiled build, so results are
+    bit-identical to it.
+    """
+    n = C0.shape[0]
+
+    G_hist = np.empty((N, n), np.int8)
+    W_hist = np.empty(N)
+    payoffs_hist = np.empty((N, n, 2), C0.dtype)
+
+    # initial strategies, adoption and threshold
+    can_adopt = gdp_pc > min_gdp_threshold
+    G = ((EconomicGains > C0) & can_adopt).astype(np.int8)
+    W_t = _ordered_sum(G * influence)
+    T = _ordered_sum(influence) * theta
+
+    P = Pressure0.copy()
+
+    U = 0.1 * (np.arange(1, N + 1) / N) ** lambda_u
+
+    for r in range(N):
+        T_d = np.float64(1.0 if W_t >= T else 0.0)
+
+        cost_scale = 1 - Z * (1 + W_t)
+        pressure_scale = gamma * (1 + W_t)
+        perceived_scale = (1.0 - T_d) * U[r] * 0.25
+        benefit_scale = T_d + perceived_scale
+
+        C_t = C0 * cost_scale
+        P[:] = P * pressure_scale
+
+        adopt_score = EconomicGains - C_t + ClimatePayoff * perceived_scale + P
+        G = ((adopt_score > 0) & can_adopt).astype(np.int8)
+
+        G_hist[r] = G
+        payoffs_hist[r, :, 0] = EconomicGains - C_t + ClimatePayoff * benefit_scale
+        payoffs_hist[r, :, 1] = ClimatePayoff * T_d - P
+
+        W_t = _ordered_sum(G * influence)
+        W_hist[r] = W_t
+
+    return G_hist, W_hist, payoffs_hist
+
+
+if HAVE_NUMBA:
+    # Serial build: the default. At the app's ~200 countries the parallel build
+    # is 2-4x slower, because every round pays a thread-pool dispatch.
+    run_simulation_nb = njit(cache=True)(_run_rounds)
+
+    # Parallel build for large country sets. Not cached on disk: numba keys its
+    # cache on the function, not the compile flags, so it would collide with
+    # the serial build's entry.
+    run_simulation_parallel_nb = njit(parallel=True)(_run_rounds)
+else:
+    run_simulation_nb = run_simulation_parallel_nb = _run_rounds_numpy
+
+# Country count from which the parallel build may be used. UNTESTED PLACEHOLDER:
+# only timed with a single numba thread, so this is not a measured crossover.
+# Set it from a multi-thread benchmark of the two builds. Results match at any
+# value: the W_t sum is serial in both, so only speed depends on it.
+PARALLEL_MIN_COUNTRIES = 100000
+
+
+def pick_kernel(n):
+    """
+    Returns the kernel build to use for n countries.
+
+    The parallel build only when the selection is large and numba has more
+    than one thread; with a single thread there is no parallelism to win
+    back its dispatch overhead.
+    """
+    if HAVE_NUMBA and n >= PARALLEL_MIN_COUNTRIES and get_num_threads() > 1:
+        return run_simulation_parallel_nb
+    return run_simulation_nb